@@ -1,13 +1,25 @@
 """Base Hangman playing class"""
 
-import urllib.request
 import time
-import json
+import array
+import random
 import functools
+import collections
+import itertools
+import mmap
 import os
+import re
+import sys
 import enum
 
-from typing import Callable, Sequence, Optional, Set, List, NamedTuple, Union, Dict, Any
+from typing import (
+	Callable, Sequence, Iterable, Optional, Set, FrozenSet, AbstractSet,
+	List, NamedTuple, Union, Dict, Tuple, TextIO, Any, cast
+)
+
+WORD_DELIMITERS = re.compile(r'[,\n]+')
+# Words within wordfile content, from their first character up to the next delimiter
+WORD_PATTERN = re.compile(rb'[^,\s][^,\n]*')
 
 class GameStatus(enum.Enum):
 	"""Status of a game"""
@@ -38,10 +50,20 @@ class GameState(NamedTuple):
 
 	max_lives: int
 
+class GameSummary(NamedTuple):
+	"""Totals of a game, for front ends to word as they like"""
+	duration: float
+	gps: float
+	guesses: int
+	word: str
+
 class HangmanOver(Exception):
 	"""Raised when an action is attempted when the game is over"""
 
 
+# The following decorators are no longer applied to Hangman itself - its guess
+# methods inline their behavior - but remain available for subclasses
+
 def gameover_protection(func: GuessMethod) -> GuessMethod:
 	"""Prevent actions when game is over"""
 	@functools.wraps(func)
@@ -57,7 +79,7 @@ def record_guess(func: GuessMethod) -> GuessMethod:
 	@functools.wraps(func)
 	def wrapper(self: 'Hangman', guess: str) -> int:
 		ret_val = func(self, guess)
-		self.guesses.append(Guess(time.time(), guess, int(ret_val)))
+		self._log_guess(guess, int(ret_val))  # pylint: disable=protected-access
 		return ret_val
 	return wrapper
 
@@ -69,12 +91,12 @@ def record_visible_letters(func: GuessMethod) -> GuessMethod:
 		if not ret_val:
 			return ret_val
 
-		already_visible = self.visible_letters.copy()
-		self.visible_letters.update(set(guess))
+		# pylint: disable=protected-access
+		new_letters = self.letter_mask(guess) & ~self.visible_mask
+		self.visible_mask |= new_letters
+		self._invalidate_visible()
 
-		new_letters = set(guess) & self.visible_letters
-		# pylint: disable=line-too-long
-		return sum(1 for char in self.visible_word if char in new_letters and char not in already_visible)
+		return sum(count for bit, count in self._letter_counts.items() if bit & new_letters)
 	return wrapper
 
 def record_win(func: GuessMethod) -> GuessMethod:
@@ -98,7 +120,7 @@ def update_lives(func: GuessMethod) -> GuessMethod:
 	def wrapper(self: 'Hangman', guess: str) -> int:
 		ret_val = func(self, guess)
 		if not ret_val:
-			self.lives -= 1
+			self._misses += 1  # pylint: disable=protected-access
 
 		if not self.lives:
 			self.ended = time.time()
@@ -109,6 +131,9 @@ def update_lives(func: GuessMethod) -> GuessMethod:
 
 class WordReader:
 	"""Collection of methods to read word lists from various sources"""
+	# Wordlists fetched from URLs are cached here for CACHE_TTL seconds
+	CACHE_DIR = os.path.expanduser(os.path.join('~', '.cache', 'hangman'))
+	CACHE_TTL = 24 * 60 * 60
 
 	@staticmethod
 	def parse_data(data: Union[Dict[Any, Any], List[str]]) -> Set[str]:
@@ -120,71 +145,249 @@ class WordReader:
 
 	@staticmethod
 	def parse_text(text: str) -> Set[str]:
-		"""Parse word data from text - seperated either by newline or commas"""
-		delims = ['\n', ',']
-		words: List[str] = []
-		while delims and len(words) <= 1:
-			words = [word for word in [word.strip() for word in text.split(delims.pop(0))] if word]
+		"""Parse word data from text - seperated by newlines and/or commas"""
+		return {word for word in (word.strip().upper() for word in WORD_DELIMITERS.split(text)) if word}
+
+	@staticmethod
+	def parse_lines(lines: Iterable[str]) -> Set[str]:
+		"""Parse word data from lines of text - each of which may contain comma-seperated words"""
+		words = {word.strip().upper() for line in lines for word in WORD_DELIMITERS.split(line)}
+		words.discard('')
+		return words
+
+	@staticmethod
+	@functools.lru_cache(maxsize=8)
+	def fetch_url(url: str) -> FrozenSet[str]:
+		"""Fetch wordlist from URL - or the on-disk cache if fetched recently"""
+		# Imported on use as most sessions only ever read local files
+		# pylint: disable=import-outside-toplevel
+		import hashlib
+		import json
+		import urllib.request
+
+		cache_path = os.path.join(
+			WordReader.CACHE_DIR, hashlib.blake2b(url.encode()).hexdigest()[:16] + '.json'
+		)
+		try:
+			if time.time() - os.path.getmtime(cache_path) < WordReader.CACHE_TTL:
+				with open(cache_path) as cache_file:
+					return frozenset(json.load(cache_file))
+		except (OSError, ValueError):
+			pass
+
+		with urllib.request.urlopen(url) as response:
+			content_type = response.headers.get('Content-Type').split(';')[0]
+
+			if content_type == 'text/plain':
+				words = WordReader.parse_lines(line.decode() for line in response)
+			elif content_type == 'application/json':
+				words = WordReader.parse_data(json.load(response))
+			else:
+				raise NotImplementedError(f'Content type of {content_type} is unsupported')
+
+		# Failing to cache is not fatal, the wordlist will simply be fetched again
+		try:
+			os.makedirs(WordReader.CACHE_DIR, exist_ok=True)
+			with open(cache_path, 'w') as cache_file:
+				json.dump(list(words), cache_file)
+		except OSError:
+			pass
+
+		return frozenset(words)
+
+	@staticmethod
+	def parse_file(word_file: TextIO) -> Set[str]:
+		"""Parse word data from file - JSON or text"""
+		import json  # pylint: disable=import-outside-toplevel
+
+		lines = iter(word_file)
+		first_line = next((line for line in lines if line.strip()), '')
+
+		# Only JSON needs the entire content at once, text is read line by line
+		if first_line.lstrip().startswith(('[', '{')):
+			content = first_line + word_file.read()
+			try:
+				return WordReader.parse_data(json.loads(content))
+			except json.JSONDecodeError:
+				return WordReader.parse_text(content)
 
-		return {word.upper() for word in words}
+		return WordReader.parse_lines(itertools.chain((first_line,), lines))
 
 	@staticmethod
 	def fetch_wordlist(location: str) -> Set[str]:
 		"""Fetch wordlist from file or URL"""
 		if location.startswith('http'):
-			with urllib.request.urlopen(location) as response:
-				content_type = response.headers.get('Content-Type').split(';')[0]
+			return set(WordReader.fetch_url(location))
 
-				if content_type == 'text/plain':
-					return WordReader.parse_text(response.read().decode().strip())
-				if content_type == 'application/json':
-					return WordReader.parse_data(json.loads(response.read().decode()))
-
-				raise NotImplementedError(f'Content type of {content_type} is unsupported')
-
-		elif os.path.exists(location):
+		if os.path.exists(location):
 			with open(location) as word_file:
-				content = word_file.read()
+				return WordReader.parse_file(word_file)
 
-				try:
-					return WordReader.parse_data(json.loads(content))
-				except json.JSONDecodeError:
-					return WordReader.parse_text(content)
+		raise NotImplementedError('Handling for given location protocol is unsupported')
 
-		else:
-			raise NotImplementedError('Handling for given location protocol is unsupported')
+	@staticmethod
+	def word_offsets(location: str) -> 'array.array[int]':
+		"""Offsets of the unique words within a text wordfile, found in a single scan - empty if JSON"""
+		offsets = array.array('Q')
+		with open(location, 'rb') as word_file:
+			if not os.fstat(word_file.fileno()).st_size:
+				return offsets
+
+			with mmap.mmap(word_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+				# JSON wordfiles can only be parsed as a whole
+				if not content[:1024].lstrip().startswith((b'[', b'{')):
+					seen: Set[bytes] = set()
+					for match in WORD_PATTERN.finditer(content):
+						word = match.group().strip().upper()
+						if word not in seen:
+							seen.add(word)
+							offsets.append(match.start())
+
+		return offsets
+
+	@staticmethod
+	def read_word(location: str, offset: int) -> str:
+		"""Read the word at offset within a text wordfile"""
+		with open(location, 'rb') as word_file:
+			word_file.seek(offset)
+			return WORD_DELIMITERS.split(word_file.readline().decode(), 1)[0].strip().upper()
 
 
 # pylint: disable=too-many-instance-attributes
-class Hangman:
+class Hangman:  # pylint: disable=too-many-public-methods
 	"""Bare Hangman game"""
+	__slots__ = (
+		'max_lives', '_random', '_wordlocation', '_wordfile_signature', '_word_offsets',
+		'_unused_offsets', '_wordbank', 'rounds', 'started', 'ended', 'status', '_misses', 'word',
+		'_unused_words', '_sorted_words', '_guess_times', '_guess_values',
+		'_guess_revealed', '_guessed_set', '_letter_bits', '_letter_counts', '_word_mask', 'visible_mask',
+		'_visible_word_cache', '_translation_table'
+	)
+
 	ALWAYS_VISIBLE = set(' ')
 
 	# pylint: disable=line-too-long
-	def __init__(self, lives: int = 6, wordlist: Optional[Sequence[str]] = None, wordlocation: Optional[str] = None, allow_empty: bool = False):
+	# pylint: disable=too-many-arguments
+	def __init__(
+		self, lives: int = 6, wordlist: Optional[Sequence[str]] = None, wordlocation: Optional[str] = None,
+		allow_empty: bool = False, lazy: bool = False, random_seed: Optional[int] = None
+	):
 		self.max_lives = lives
-		self.wordbank: Set[str] = set()
-
-		if wordlist:
-			self.wordbank.update({word.upper() for word in wordlist})
-		if wordlocation:
-			self.wordbank.update(WordReader.fetch_wordlist(wordlocation))
+		# Words are picked by a generator of its own, so seeded games are reproducible
+		self._random = random.Random(random_seed)
+		# Shuffled words yet to be played, refilled from the wordbank when empty
+		self._unused_words: List[str] = []
+		self._sorted_words: Optional[Tuple[str, ...]] = None
+
+		# Lazily loaded wordfiles only become the wordbank once it's accessed,
+		# words until then are read straight from the file at shuffled offsets
+		self._wordlocation: Optional[str] = None
+		# Modification time and size of the wordfile when its words were located
+		self._wordfile_signature: Tuple[int, int] = (0, 0)
+		self._word_offsets: Optional['array.array[int]'] = None
+		self._unused_offsets = array.array('Q')
+		self._wordbank: Optional[Set[str]] = None
+		if lazy and wordlocation and not wordlist and os.path.isfile(wordlocation):
+			self._wordlocation = wordlocation
+			if not os.path.getsize(wordlocation) and not allow_empty:
+				raise ValueError('No words loaded')
+		else:
+			words: Set[str] = set()
+			if wordlist:
+				words.update({word.upper() for word in wordlist})
+			if wordlocation:
+				words.update(WordReader.fetch_wordlist(wordlocation))
+			self.wordbank = words
 
-		if not self.wordbank and not allow_empty:
-			raise ValueError('No words loaded')
+			if not self.wordbank and not allow_empty:
+				raise ValueError('No words loaded')
 
 		self.rounds: List[GameState] = []
 
 		self.started = 0.0
 		self.ended: Optional[float] = None
 		self.status = GameStatus.INACTIVE
-		self.lives = lives
+		self._misses = 0
 
 		self.word: str = ''
-		self.used_words: Set[str] = set()
 
-		self.guesses: List[Guess] = []
-		self.visible_letters = self.ALWAYS_VISIBLE.copy()
+		# Guesses are logged column by column, only becoming Guess instances when read
+		self._guess_times = array.array('d')
+		self._guess_values: List[str] = []
+		self._guess_revealed = array.array('L')
+		self._guessed_set: Set[str] = set()
+
+		# Each unique character of the word is assigned a bit, so sets of
+		# characters - guessed, visible, or in the word - are plain integers
+		self._letter_bits: Dict[str, int] = {}
+		self._letter_counts: Dict[int, int] = {}
+		self._word_mask = 0
+		self.visible_mask = 0
+
+		self._visible_word_cache: Optional[str] = None
+		self._translation_table: Dict[int, str] = {}
+
+	def _prepare_word(self) -> None:
+		"""Assign bits to the characters of the current word, hiding all but ALWAYS_VISIBLE"""
+		counts = collections.Counter(self.word)
+		self._letter_bits = {char: 1 << i for i, char in enumerate(counts)}
+		self._letter_counts = {self._letter_bits[char]: count for char, count in counts.items()}
+		self._word_mask = (1 << len(self._letter_bits)) - 1
+		self.visible_mask = self.letter_mask(self.ALWAYS_VISIBLE)
+		self._invalidate_visible()
+
+	def _invalidate_visible(self) -> None:
+		"""Rebuild the hidden character table, discarding the cached visible word"""
+		self._translation_table = {
+			ord(char): '_' for char, bit in self._letter_bits.items() if not bit & self.visible_mask
+		}
+		self._visible_word_cache = None
+
+	def letter_mask(self, chars: Iterable[str]) -> int:
+		"""Bitmask of the characters that are within the current word"""
+		return sum(self._letter_bits.get(char, 0) for char in set(chars))
+
+	@property
+	def wordbank(self) -> AbstractSet[str]:
+		"""Words available to be played - changed through the setter, add_word or remove_word"""
+		if self._wordbank is None:
+			self.wordbank = WordReader.fetch_wordlist(self._wordlocation) if self._wordlocation else set()
+		return cast(Set[str], self._wordbank)
+
+	@wordbank.setter
+	def wordbank(self, words: AbstractSet[str]) -> None:
+		"""Replace the available words, interning them as they are compared against often"""
+		self._wordbank = set(map(sys.intern, words))
+		self._on_wordbank_changed()
+
+	def add_word(self, word: str) -> None:
+		"""Add a single word to the wordbank"""
+		cast(Set[str], self.wordbank).add(word)
+		self._on_wordbank_changed()
+
+	def remove_word(self, word: str) -> None:
+		"""Remove a single word from the wordbank, if present"""
+		cast(Set[str], self.wordbank).discard(word)
+		self._on_wordbank_changed()
+
+	def _on_wordbank_changed(self) -> None:
+		"""Discard state derived from the previous wordbank"""
+		self._unused_words = []
+		self._sorted_words = None
+		self._word_offsets = None
+		del self._unused_offsets[:]
+
+	@property
+	def sorted_words(self) -> Tuple[str, ...]:
+		"""Words of the wordbank in alphabetical order - sorted once per wordbank"""
+		if self._sorted_words is None:
+			self._sorted_words = tuple(sorted(self.wordbank))
+		return self._sorted_words
+
+	@property
+	def lives(self) -> int:
+		"""Remaining lives"""
+		return self.max_lives - self._misses
 
 	@property
 	def duration(self) -> float:
@@ -214,47 +417,93 @@ class Hangman:
 	@property
 	def guess_count(self) -> int:
 		"""Number of guessed made"""
-		return len(self.guesses)
+		return len(self._guess_values)
+
+	@property
+	def guesses(self) -> List[Guess]:
+		"""Guesses made"""
+		return [
+			Guess(*guess) for guess in zip(self._guess_times, self._guess_values, self._guess_revealed)
+		]
+
+	@property
+	def guess_values(self) -> Sequence[str]:
+		"""Guesses made, in order - without building Guess instances"""
+		return self._guess_values
+
+	@property
+	def visible_letters(self) -> Set[str]:
+		"""Characters currently visible"""
+		return self.ALWAYS_VISIBLE | {
+			char for char, bit in self._letter_bits.items() if bit & self.visible_mask
+		}
 
 	@property
 	def visible_word(self) -> str:
 		"""Currently visible word"""
-		visible_word = ''
-		for char in self.word:
-			visible_word += char if char in self.visible_letters or char in self.ALWAYS_VISIBLE else '_'
-		return visible_word
+		if self._visible_word_cache is None:
+			self._visible_word_cache = self.word.translate(self._translation_table)
+		return self._visible_word_cache
+
+	@property
+	def guessed_set(self) -> AbstractSet[str]:
+		"""Unique guesses made"""
+		return self._guessed_set
 
 	@property
 	def state(self) -> GameState:
 		"""Current state of the game"""
 		return GameState(self.started, self.ended, self.status, self.word, self.guesses, self.max_lives)
 
+	@property
+	def summary(self) -> GameSummary:
+		"""Duration, seconds per guess, guess count, and word of the game"""
+		duration = self.duration
+		guesses = self.guess_count
+		return GameSummary(duration, duration / guesses if guesses else 0.0, guesses, self.word)
+
+	def _pick_word(self) -> str:
+		"""Pick a random unused word, reusing the wordbank once all have been used"""
+		if self._wordbank is None and self._wordlocation:
+			# Other processes may have rewritten the wordfile since its words were located
+			stat = os.stat(self._wordlocation)
+			signature = (stat.st_mtime_ns, stat.st_size)
+			if self._word_offsets is None or signature != self._wordfile_signature:
+				self._wordfile_signature = signature
+				self._word_offsets = WordReader.word_offsets(self._wordlocation)
+				del self._unused_offsets[:]
+			if not self._unused_offsets:
+				self._unused_offsets = array.array('Q', self._word_offsets)
+				self._random.shuffle(self._unused_offsets)
+			if self._unused_offsets:
+				return WordReader.read_word(self._wordlocation, self._unused_offsets.pop())
+
+		if not self._unused_words:
+			# Shuffled in sorted order, as set order varies between processes
+			self._unused_words = list(self.sorted_words)
+			self._random.shuffle(self._unused_words)
+
+		return self._unused_words.pop() if self._unused_words else ''
+
 	def start(self, word: Optional[str] = None) -> 'Hangman':
 		"""Start the game"""
-		if len(self.wordbank) == len(self.used_words):
-			self.used_words = set()
-
 		# Only save current state if the game was active at one point
 		if self.status != GameStatus.INACTIVE:
 			self.rounds.append(self.state)
 
-		if word:
-			self.word = word
-		elif self.wordbank:
-			# Since self.wordbank is a set, randomization is not required
-			self.word = next(word for word in self.wordbank if word not in self.used_words)
-			self.used_words.add(self.word)
-		else:
-			self.word = ''
+		self.word = word or self._pick_word()
 
 		self.started = time.time()
 		self.ended = None
-		self.lives = self.max_lives
+		self._misses = 0
 		# Don't activate the game if the word is empty
 		self.status = GameStatus.ACTIVE if self.word else GameStatus.INACTIVE
 
-		self.guesses = []
-		self.visible_letters = self.ALWAYS_VISIBLE.copy()
+		del self._guess_times[:]
+		self._guess_values.clear()
+		del self._guess_revealed[:]
+		self._guessed_set.clear()
+		self._prepare_word()
 
 		return self
 
@@ -269,29 +518,66 @@ class Hangman:
 		self.word = ''
 		self.started = time.time()
 		self.ended = None
-		self.lives = self.max_lives
+		self._misses = 0
 		self.status = GameStatus.INACTIVE
 
-		self.guesses = []
-		self.visible_letters = self.ALWAYS_VISIBLE.copy()
+		del self._guess_times[:]
+		self._guess_values.clear()
+		del self._guess_revealed[:]
+		self._guessed_set.clear()
+		self._prepare_word()
 
 		return self
 
 
-	@record_win
-	@update_lives
-	@record_guess
-	@record_visible_letters
-	@gameover_protection
+	def _log_guess(self, guess: str, revealed: int) -> None:
+		"""Log a guess"""
+		self._guess_times.append(time.time())
+		self._guess_values.append(guess)
+		self._guess_revealed.append(revealed)
+		self._guessed_set.add(guess)
+
+	def _apply_guess(self, guess: str, is_word: bool) -> int:
+		"""Apply a guess to the game, returning the number of characters revealed"""
+		if not self.active:
+			raise HangmanOver(f'The game is {str(self.status)}')
+
+		if is_word:
+			# A correct word reveals every letter, no need to inspect the guess itself
+			guess_mask = self._word_mask if guess == self.word else 0
+		elif len(guess) == 1:
+			guess_mask = self._letter_bits.get(guess, 0)
+		else:
+			guess_mask = self.letter_mask(guess) if guess in self.word else 0
+
+		revealed = 0
+		new_letters = guess_mask & ~self.visible_mask
+		if new_letters:
+			self.visible_mask |= new_letters
+			self._invalidate_visible()
+
+			# A single new letter is the common case, and maps directly to its count
+			revealed = self._letter_counts.get(new_letters) or sum(
+				count for bit, count in self._letter_counts.items() if bit & new_letters
+			)
+
+		self._log_guess(guess, revealed)
+
+		self._misses += not revealed
+		if self._misses >= self.max_lives:
+			self.ended = time.time()
+			self.status = GameStatus.LOST
+
+		if revealed and self.visible_mask == self._word_mask:
+			self.ended = time.time()
+			self.status = GameStatus.WON
+
+		return revealed
+
 	def guess_letter(self, letter: str) -> int:
 		"""Guess a letter"""
-		return letter in self.word
+		return self._apply_guess(letter, False)
 
-	@record_win
-	@update_lives
-	@record_guess
-	@record_visible_letters
-	@gameover_protection
 	def guess_word(self, word: str) -> int:
 		"""Guess the entire word"""
-		return word == self.word
+		return self._apply_guess(word, True)
@@ -1,14 +1,35 @@
 """CLI version of Hangman"""
 
-import subprocess
 import textwrap
+import selectors
+import sys
 import os
 
-from typing import Dict, Callable, Tuple, Union, NamedTuple, Optional
+from typing import Dict, Callable, Sequence, Tuple, Union, NamedTuple, Optional
+
+# Line editing and history for input(), where available
+try:
+	import readline  # pylint: disable=unused-import
+except ImportError:
+	pass
 
 from hangman import Hangman, WordReader
 
 
+# Game over messages, formatted with the game summary
+# pylint: disable=line-too-long
+WIN_MESSAGE = textwrap.dedent('''
+	You won!
+
+	It took you {duration:.1f} seconds - about {gps:.1f} seconds per guess, of which you took {guesses} - to guess "{word}"!
+''')
+LOSS_MESSAGE = textwrap.dedent('''
+	You Lost!
+
+	You couldn't guess "{word}" in {duration:.1f} seconds, at a rate of {gps:.1f} seconds per guess, of which you took {guesses}...
+''')
+# pylint: enable=line-too-long
+
 # The optional slug of the next menu
 # A method that returns nothing, causing the menu not to change
 # A tuple of a method that returns nothing and the next menu slug.
@@ -27,33 +48,80 @@ class Menu(NamedTuple):
 	# A dict of options with menu response values or a method called which returns a menu response
 	options: Union[Dict[str, MenuResponse], Callable[[], MenuResponse]]
 
-def get_choice(*options: str) -> str:
-	"""Get the choice of a user"""
+# Letters which can be entered in place of option numbers
+LETTER_CHOICES = {chr(ord('A') + i): i + 1 for i in range(26)}
+
+def print_choices(options: Sequence[str]) -> None:
+	"""Print numbered options"""
 	for i, option in enumerate(options):
 		print(f'{i + 1:02d}. {option}')
 
+# Seconds without input after which the user is considered idle
+IDLE_DELAY = 0.1
+# Only terminals can be waited on without risking input already buffered by Python
+IDLE_DETECTION = os.name != 'nt' and sys.stdin.isatty()
+
+def idle_input(prompt: str, on_idle: Optional[Callable[[], None]] = None) -> str:
+	"""Get input from user, calling on_idle if they haven't typed ahead of the prompt"""
+	if not on_idle:
+		return input(prompt)
+
+	if not IDLE_DETECTION:
+		on_idle()
+		return input(prompt)
+
+	# Waited on before prompting, as input() needs the prompt itself for line editing to redraw it
+	with selectors.DefaultSelector() as selector:
+		selector.register(sys.stdin, selectors.EVENT_READ)
+		if not selector.select(IDLE_DELAY):
+			on_idle()
+
+	return input(prompt)
+
+def get_choice(options: Sequence[str], on_idle: Optional[Callable[[], None]] = None) -> str:
+	"""Get the choice of a user"""
+	print_choices(options)
+
+	count = len(options)
 	while True:
-		response = input('> ').upper()
-		if not response.isnumeric():
-			if not response.isalpha():
+		response = idle_input('> ', on_idle).upper()
+		number = LETTER_CHOICES.get(response)
+		if number is None:
+			try:
+				number = int(response)
+			except ValueError:
 				print('Input must be a number')
 				continue
-			response = str(ord(response) - 64)
 
-		number = int(response)
-		if number <= 0 or number > len(options):
-			print(f'Choice must be between 1 and {len(options)}')
+		if not 0 < number <= count:
+			print(f'Choice must be between 1 and {count}')
 			continue
 
 		return options[number - 1]
 
 
+# Erase the display and move the cursor home - terminals only
+CLEAR_SEQUENCE = '\x1b[2J\x1b[H' if sys.stdout.isatty() else ''
+# Windows consoles only interpret escape sequences from Windows 10 build 10586 on, and
+# once virtual terminal processing is enabled - which running any shell command does
+# pylint: disable=no-member
+LEGACY_CONSOLE = sys.platform == 'win32' and sys.getwindowsversion()[:3] < (10, 0, 10586)
+# pylint: enable=no-member
+if os.name == 'nt' and CLEAR_SEQUENCE and not LEGACY_CONSOLE:
+	os.system('')
+
 def clear_screen() -> None:
 	"""Attempt to clear the screen"""
-	subprocess.call('cls || clear', shell=True, stderr=subprocess.PIPE)
+	if LEGACY_CONSOLE:
+		os.system('cls')
+	elif CLEAR_SEQUENCE:
+		sys.stdout.write(CLEAR_SEQUENCE)
+		sys.stdout.flush()
 
 class HangmanCLI(Hangman):
 	"""CLI variation of Hangman"""
+	__slots__ = ('wordfile', 'unsaved', '_next_word', 'current_menu_slug', 'menus', 'menu_choices')
+
 	def __init__(self, wordfile: str) -> None:
 		super().__init__(
 			lives=6,
@@ -61,6 +129,8 @@ class HangmanCLI(Hangman):
 			allow_empty=True
 		)
 		self.wordfile = wordfile
+		# Saving is deferred until the user is idle
+		self.unsaved = False
 		self._next_word: Optional[str] = None
 
 
@@ -78,16 +148,22 @@ class HangmanCLI(Hangman):
 				'Add': 'add-words',
 				'View': self.view_words,
 				'Clear': self.clear_words,
-				'Remove': self.remove_word
+				'Remove': self.prompt_remove_word
 			}),
 			'add-words': Menu('Add words or word sources to the wordbank', {
 				'Back': 'manage-words',
-				'Add Word': self.add_word,
+				'Add Word': self.prompt_add_word,
 				'Add Wordlist': self.add_wordlist,
 			}),
 			'play': Menu(None, self.gameplay),
 			'play-other': Menu(None, self.play_other)
 		}
+		# Options of static menus, in display order
+		self.menu_choices = {
+			slug: tuple(menu.options)
+			for slug, menu in self.menus.items()
+			if isinstance(menu.options, dict)
+		}
 
 	@property
 	def next_word(self) -> Optional[str]:
@@ -102,14 +178,23 @@ class HangmanCLI(Hangman):
 		self._next_word = value
 
 	def save_wordfile(self) -> None:
-		"""Save content of wordbank to wordfile"""
+		"""Schedule saving of wordbank to wordfile, combining consecutive changes into one save"""
+		self.unsaved = True
+
+	def flush_wordfile(self) -> None:
+		"""Save content of wordbank to wordfile if changed"""
+		if not self.unsaved:
+			return
+
+		self.unsaved = False
 		with open(self.wordfile, 'w') as wordfile:
 			wordfile.write('\n'.join(self.wordbank))
 
 	def view_words(self) -> None:
 		"""View words in wordfile"""
 		clear_screen()
-		print(', '.join(sorted(self.wordbank)))
+		# Printed as separate arguments to avoid building one string of the entire wordbank
+		print(*self.sorted_words, sep=', ')
 		print(f'{len(self.wordbank)} words loaded')
 
 	def clear_words(self) -> None:
@@ -118,7 +203,7 @@ class HangmanCLI(Hangman):
 		print(f'{len(self.wordbank)} words cleared')
 		self.wordbank = set()
 
-	def remove_word(self) -> None:
+	def prompt_remove_word(self) -> None:
 		"""Ask the user for a word to remove from the wordbank"""
 		clear_screen()
 		word = input('Enter the word you wish to remove: ').upper()
@@ -127,21 +212,20 @@ class HangmanCLI(Hangman):
 			print('Word not found')
 		else:
 			print('Word removed')
-			self.wordbank.remove(word)
+			self.remove_word(word)
 			self.save_wordfile()
 
-	def add_word(self) -> None:
+	def prompt_add_word(self) -> None:
 		"""Ask the user for a word to add to the wordbank"""
 		clear_screen()
 		word = input('Enter word to add: ').upper()
 
-		print(
-			'Word already in word bank'
-			if word in self.wordbank else
-			'Word added'
-		)
+		if word in self.wordbank:
+			print('Word already in word bank')
+			return
 
-		self.wordbank.add(word)
+		print('Word added')
+		self.add_word(word)
 		self.save_wordfile()
 
 	def add_wordlist(self) -> None:
@@ -149,10 +233,12 @@ class HangmanCLI(Hangman):
 		clear_screen()
 		location = input('Enter location of wordlist: ')
 		try:
-			before = len(self.wordbank)
-			self.wordbank.update(WordReader.fetch_wordlist(location))
-			print(f'{len(self.wordbank) - before} words added from "{location}"')
-			self.save_wordfile()
+			# Only the new words are merged, leaving the wordbank and wordfile alone if there are none
+			words = WordReader.fetch_wordlist(location) - self.wordbank
+			print(f'{len(words)} words added from "{location}"')
+			if words:
+				self.wordbank = self.wordbank | words
+				self.save_wordfile()
 		except (ValueError, NotImplementedError) as ex:
 			print(f'Exception occured fetching wordlist from {location}: {ex}')
 
@@ -179,22 +265,26 @@ class HangmanCLI(Hangman):
 			self.start(self.next_word or None)
 
 
-		print(FRAMES[len(FRAMES) - 1 - self.lives].join(IMAGE))
-		print(f'Word: {self.visible_word}')
-		char_guesses = [guess.guess for guess in self.guesses]
-		print(f'Guesses: {", ".join(char_guesses)}')
+		char_guesses = self._guess_values
+		# Write the entire frame at once
+		sys.stdout.write(
+			f'{COMPOSED_FRAMES[self.lives]}\n'
+			f'Word: {self.visible_word}\n'
+			f'Guesses: {", ".join(char_guesses)}\n'
+		)
+		sys.stdout.flush()
 		if self.active:
 			while True:
 				guess = input('Enter Guess: ').upper()
 
 				# pylint: disable=line-too-long
-				msg = 'Guess required' if not guess else 'Already guessed that' if guess in char_guesses else None
+				msg = 'Guess required' if not guess else 'Already guessed that' if guess in self.guessed_set else None
 				if not msg:
 					break
 
 				print(msg)
 
-			revealed = getattr(self, 'guess_' + ('word' if len(guess) > 1 else 'letter'))(guess)
+			revealed = (self.guess_word if len(guess) > 1 else self.guess_letter)(guess)
 			print(
 				f'You revealed {revealed} characters'
 				if revealed else
@@ -203,19 +293,7 @@ class HangmanCLI(Hangman):
 
 			return 'play'
 
-		print(
-			textwrap.dedent(f'''
-			You won!
-
-			It took you {self.duration:.1f} seconds - about {self.duration / self.guess_count:.1f} seconds per guess, of which you took {self.guess_count} - to guess "{self.word}"!
-			''')
-			if self.won else
-			textwrap.dedent(f'''
-			You Lost!
-
-			You couldn't guess "{self.word}" in {self.duration:.1f} seconds, at a rate of {self.duration / self.guess_count:.1f} seconds per guess, of which you took {self.guess_count}...
-			''')
-		)
+		print((WIN_MESSAGE if self.won else LOSS_MESSAGE).format(**self.summary._asdict()))
 		self.stop()
 		return 'main'
 
@@ -230,6 +308,13 @@ class HangmanCLI(Hangman):
 		'''))
 
 		self.current_menu_slug = 'main'
+		try:
+			self.menu_loop()
+		finally:
+			self.flush_wordfile()
+
+	def menu_loop(self) -> None:
+		"""Navigate menus until one exits"""
 		while self.current_menu_slug:
 			menu = self.menus[self.current_menu_slug]
 
@@ -239,7 +324,7 @@ class HangmanCLI(Hangman):
 
 			# Get choice from user if dict else get response from dynamic method
 			value = (
-				menu.options[get_choice(*menu.options.keys())]
+				menu.options[get_choice(self.menu_choices[self.current_menu_slug], self.flush_wordfile)]
 				if isinstance(menu.options, dict)
 				else menu.options()
 			)
@@ -268,6 +353,8 @@ FRAMES = [
 	'  O   |\n /|\\  |\n /    |\n',
 	'  O   |\n /|\\  |\n / \\  |\n'
 ]
+# Complete images, indexed by remaining lives
+COMPOSED_FRAMES = [FRAMES[len(FRAMES) - 1 - lives].join(IMAGE) for lives in range(len(FRAMES))]
 
 if __name__ == '__main__':
 	HangmanCLI(wordfile='wordlist.txt').run()
@@ -3,7 +3,6 @@
 import os
 import sys
 import asyncio
-import textwrap
 
 from typing import Optional, Dict, Any
 
@@ -13,6 +12,12 @@ from discord.ext import commands
 from hangman import Hangman, GameStatus
 
 
+# Game over messages in Discord markdown, formatted with the game summary
+# pylint: disable=line-too-long
+WIN_MESSAGE = '**You won!**\n\nIt took you {duration:.1f} seconds - about {gps:.1f} seconds per guess, of which you took {guesses} - to guess `{word}`!'
+LOSS_MESSAGE = '**You Lost!**\n\nYou couldn\'t guess `{word}` in {duration:.1f} seconds, at a rate of {gps:.1f} seconds per guess, of which you took {guesses}...'
+# pylint: enable=line-too-long
+
 IMAGE = ['  +---+\n  |   |\n', '      |\n=========']
 FRAMES = [
 	'      |\n      |\n      |\n',
@@ -23,6 +28,8 @@ FRAMES = [
 	'  O   |\n /|\\  |\n /    |\n',
 	'  O   |\n /|\\  |\n / \\  |\n'
 ]
+# Complete images, indexed by remaining lives
+COMPOSED_FRAMES = [FRAMES[len(FRAMES) - 1 - lives].join(IMAGE) for lives in range(len(FRAMES))]
 
 YESNO = ('✅', '❌')
 
@@ -33,9 +40,11 @@ class HangmanInstance:
 		self.user = user
 		self.game = game
 		self.message: Optional[discord.Message] = None
+		# Description last sent, so redraws that change nothing can be skipped
+		self.last_description: Optional[str] = None
 
 	async def message_exists(self) -> bool:
-		"""Return if message exists"""
+		"""Return if message exists - costing a request, so only used outside of gameplay"""
 		if not self.message:
 			return False
 
@@ -47,40 +56,45 @@ class HangmanInstance:
 
 	def current_embed(self, feedback: Optional[str] = None) -> discord.Embed:
 		"""Get current embed based on game state, with optional feedback"""
-		description = f'`{" ".join(self.game.visible_word)}`\n'
-		description += '```\n' + FRAMES[len(FRAMES) - 1 - self.game.lives].join(IMAGE) + '\n```\n'
-		if self.game.guesses:
-			description += 'Guesses: `' + ', '.join(guess.guess for guess in self.game.guesses) + '`'
+		parts = [
+			f'`{" ".join(self.game.visible_word)}`\n', '```\n', COMPOSED_FRAMES[self.game.lives], '\n```\n'
+		]
+		if self.game.guess_count:
+			parts += ('Guesses: `', ', '.join(self.game.guess_values), '`')
 
 		if feedback:
-			description += '\n\n' + feedback
+			parts += ('\n\n', feedback)
 
 		if self.game.won or self.game.lost:
-			gps = self.game.duration / (self.game.guess_count or self.game.duration)
-
-			# pylint: disable=line-too-long
-			description += '\n\n' + textwrap.dedent(f'''
-			You won!
-
-			It took you {self.game.duration:.1f} seconds - about {gps:.1f} seconds per guess, of which you took {self.game.guess_count} - to guess "{self.game.word}"!
-			''') if self.game.won else textwrap.dedent(f'''
-			You Lost!
-
-			You couldn't guess "{self.game.word}" in {self.game.duration:.1f} seconds, at a rate of {gps:.1f} seconds per guess, of which you took {self.game.guess_count}...
-			''')
+			message = WIN_MESSAGE if self.game.won else LOSS_MESSAGE
+			parts += ('\n\n', message.format(**self.game.summary._asdict()))
 
 		return discord.Embed(
 			title=f'Hangman with {self.user.display_name}',
-			description=description
+			description=''.join(parts)
 		)
 
 	# pylint: disable=line-too-long
 	async def send_message(self, target: discord.abc.Messageable, feedback: Optional[str] = None) -> 'HangmanInstance':
-		"""Send message to target - deleting current if it exists"""
-		if self.message and await self.message_exists():
-			await self.message.delete()
-
-		self.message = await target.send(embed=self.current_embed(feedback))
+		"""Send message to target - editing current if latest in target, otherwise replacing it"""
+		embed = self.current_embed(feedback)
+		self.last_description = embed.description
+		if self.message:
+			# Contexts are messageable through their channel
+			channel = getattr(target, 'channel', target)
+			try:
+				if (
+					channel.id == self.message.channel.id
+					and getattr(channel, 'last_message_id', None) == self.message.id
+				):
+					await self.message.edit(embed=embed)
+					return self
+
+				await self.message.delete()
+			except discord.NotFound:
+				pass
+
+		self.message = await target.send(embed=embed)
 		await self.message.add_reaction(YESNO[1])
 
 		return self
@@ -90,9 +104,14 @@ class HangmanInstance:
 		if not self.message:
 			return
 
-		if await self.message_exists():
-			await self.message.edit(embed=self.current_embed(feedback))
-		else:
+		embed = self.current_embed(feedback)
+		if embed.description == self.last_description:
+			return
+
+		try:
+			await self.message.edit(embed=embed)
+			self.last_description = embed.description
+		except discord.NotFound:
 			await self.send_message(self.message.channel, feedback)
 
 	def is_valid_guess(self, guess: str) -> bool:
@@ -101,12 +120,12 @@ class HangmanInstance:
 
 	async def guess(self, guess: str) -> None:
 		"""Make a guess"""
-		revealed = getattr(self.game, 'guess_' + ('letter' if len(guess) == 1 else 'word'))(guess)
+		revealed = (self.game.guess_letter if len(guess) == 1 else self.game.guess_word)(guess)
 		await self.redraw(f'You revealed {revealed} letters' if revealed else None)
 
 	def has_guessed(self, guess: str) -> bool:
 		"""Return if guess has been guessed before"""
-		return guess in [guess.guess for guess in self.game.guesses]
+		return guess in self.game.guessed_set
 
 
 class HangmanCog(commands.Cog):  # type: ignore
@@ -120,22 +139,20 @@ class HangmanCog(commands.Cog):  # type: ignore
 
 	def game_for(self, user: discord.User) -> Hangman:
 		"""Get base Hangman game for user"""
-		return self.games.setdefault(user.id, Hangman(
-			lives=6,
-			wordlocation=self.wordfile if os.path.exists(self.wordfile) else None,
-			allow_empty=True
-		))
-
-	def computer_can_play(self) -> bool:
-		"""Return if computer can currently play against users"""
-		try:
-			Hangman(
+		game = self.games.get(user.id)
+		if game is None:
+			game = self.games[user.id] = Hangman(
 				lives=6,
 				wordlocation=self.wordfile if os.path.exists(self.wordfile) else None,
+				allow_empty=True,
+				lazy=True
 			)
-			return True
-		except (ValueError, NotImplementedError):
-			return False
+		return game
+
+	def computer_can_play(self) -> bool:
+		"""Return if computer can currently play against users"""
+		# Checked without parsing, as it's done on every command
+		return os.path.isfile(self.wordfile) and os.path.getsize(self.wordfile) > 0
 
 	async def end_instance(self, instance: HangmanInstance) -> None:
 		"""End an instance, making the message an orphan"""
@@ -144,17 +161,21 @@ class HangmanCog(commands.Cog):  # type: ignore
 			await instance.redraw()
 
 		del self.instances[instance.user.id]
-		if instance.message and await instance.message_exists():
-			await instance.message.clear_reactions()
+		if instance.message:
+			try:
+				await instance.message.clear_reactions()
+			except discord.NotFound:
+				pass
 
 	@commands.Cog.listener()
 	async def on_reaction_add(self, reaction: discord.Reaction, user: discord.User) -> None:
 		"""Detect the canceling of a game"""
-		instance = self.instances.get(user.id, None)
-		if not instance or not instance.message:
+		# Most reactions are not cancellations, so the emoji is checked before any lookup
+		if str(reaction) != YESNO[1]:
 			return
 
-		if reaction.message.id != instance.message.id or str(reaction) != YESNO[1]:
+		instance = self.instances.get(user.id, None)
+		if not instance or not instance.message or reaction.message.id != instance.message.id:
 			return
 
 		await self.end_instance(instance)
@@ -166,7 +187,7 @@ class HangmanCog(commands.Cog):  # type: ignore
 			return
 
 		instance = self.instances.get(message.author.id, None)
-		if not instance or not instance.message:
+		if not instance or not instance.message or not instance.game.active:
 			return
 
 		if instance.message.channel.id != message.channel.id:
@@ -210,11 +231,13 @@ class HangmanCog(commands.Cog):  # type: ignore
 			return
 
 		if not challenging:
-			if not self.computer_can_play():
+			# A wordfile of only blank lines passes the size check, but starts no game
+			game = self.game_for(ctx.author).start() if self.computer_can_play() else None
+			if not game or not game.active:
 				await ctx.send('Cannot play against computer, wordlist is empty')
 				return
 
-			instance = await HangmanInstance(ctx.author, self.game_for(ctx.author).start()).send_message(
+			instance = await HangmanInstance(ctx.author, game).send_message(
 				ctx,
 				'Enter a guess to start'
 			)
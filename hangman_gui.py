@@ -1,18 +1,48 @@
 """Tkinter GUI version of Hangman"""
 
 import os
-import textwrap
+import functools
+import concurrent.futures
 
 import turtle
 import tkinter
 import tkinter.simpledialog
 import tkinter.messagebox
 
-from typing import Tuple, Any
+from typing import Callable, Tuple, AbstractSet, Optional, Any
 
 from hangman import Hangman, WordReader
 
 
+# Game over messages, sized for the feedback label and formatted with the game summary
+# pylint: disable=line-too-long
+WIN_MESSAGE = 'You won!\n\nYou guessed "{word}" in {duration:.1f} seconds and {guesses} guesses - about {gps:.1f} seconds per guess.'
+LOSS_MESSAGE = 'You Lost!\n\nThe word was "{word}" - you took {guesses} guesses over {duration:.1f} seconds, about {gps:.1f} seconds per guess.'
+# pylint: enable=line-too-long
+
+# Milliseconds to wait for further wordbank changes before saving
+SAVE_DELAY = 200
+# Canvas tag of the items making up the hangman base
+BASE_TAG = 'hangman-base'
+
+
+def write_wordfile(location: str, words: AbstractSet[str]) -> None:
+	"""Write words to wordfile, replacing it only once completely written"""
+	temp_location = location + '.tmp'
+	with open(temp_location, 'w') as wordfile:
+		wordfile.writelines(word + '\n' for word in words)
+	os.replace(temp_location, location)
+
+
+@functools.lru_cache(maxsize=64)
+def parse_shorthand(tcmds: str) -> Tuple[Tuple[str, Tuple[float, ...]], ...]:
+	"""Parse shorthand commands into method names and arguments"""
+	commands = []
+	for cmd in tcmds.split(';'):
+		method, *args = cmd.strip().split('<')
+		commands.append((method, tuple(map(float, args[0].split('|'))) if args else ()))
+	return tuple(commands)
+
 
 class HangmanTurtle(turtle.RawTurtle):
 	"""Turtle with hangman-drawing methods"""
@@ -24,10 +54,9 @@ class HangmanTurtle(turtle.RawTurtle):
 		return canvas.winfo_width(), canvas.winfo_height()
 
 	def shorthand(self, tcmds: str) -> None:
-		"""Evaluate shorthand commands"""
-		for cmd in tcmds.split(';'):
-			method, *args = cmd.strip().split('<')
-			getattr(self, method)(*(map(float, args[0].split('|')) if args else tuple()))
+		"""Evaluate shorthand commands - parsed once for as long as the canvas size is unchanged"""
+		for method, args in parse_shorthand(tcmds):
+			getattr(self, method)(*args)
 
 	def draw_base(self) -> None:
 		"""Draw hangman base"""
@@ -77,12 +106,13 @@ class HangmanTurtle(turtle.RawTurtle):
 		self.setheading(origin[1])
 
 
-
-class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
+class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors,too-many-instance-attributes
 	"""Frame containing current game state"""
 	def __init__(self, *args: Any, game: Hangman, **kwargs: Any) -> None:
 		super().__init__(*args, **kwargs)
 		self.game = game
+		self.shown_word = ''
+		self.pending_update: Optional[str] = None
 
 		self.visible_word = tkinter.Label(
 			self, relief=tkinter.SUNKEN,
@@ -100,6 +130,14 @@ class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
 		self.turtle.pensize(2)
 		self.turtle.hideturtle()
 
+		# The base is drawn by its own turtle, so it can be kept between games
+		self.base_turtle = HangmanTurtle(self.turtle_screen)
+		self.base_turtle.pensize(2)
+		self.base_turtle.hideturtle()
+		self.base_turtle.fillcolor('brown4')
+		self.base_turtle.pencolor('saddlebrown')
+		self.base_size = (0, 0)
+
 
 		self.feedback = tkinter.Label(self)
 		self.feedback.grid(row=2, column=0, sticky='news')
@@ -114,19 +152,53 @@ class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
 		self.controls.grid(row=3, column=0, sticky='news')
 		self.update_controls()
 
+	def show_visible_word(self) -> None:
+		"""Update the visible word label if the visible word has changed"""
+		visible_word = self.game.visible_word
+		if visible_word != self.shown_word:
+			self.shown_word = visible_word
+			self.visible_word.configure(text=' '.join(visible_word))
+
+	def draw_base(self) -> None:
+		"""Show the hangman base, only drawing it again if the canvas has been resized"""
+		size = self.base_turtle.canvas_dimensions
+		if size != self.base_size:
+			self.base_size = size
+
+			existing = set(self.canvas.find_all())
+			self.base_turtle.clear()
+			self.base_turtle.draw_base()
+			for item in self.canvas.find_all():
+				if item not in existing:
+					self.canvas.addtag_withtag(BASE_TAG, item)
+
+		self.canvas.itemconfigure(BASE_TAG, state=tkinter.NORMAL)
+
+		# Lives are drawn from where the base ends
+		self.turtle.penup()
+		self.turtle.setpos(self.base_turtle.position())
+		self.turtle.setheading(self.base_turtle.heading())
+
+	def request_update_controls(self) -> None:
+		"""Schedule update of game controls once idle, combining consecutive requests into one update"""
+		if self.pending_update is None:
+			self.pending_update = self.after_idle(self.update_controls)
+
 	def update_controls(self) -> None:
 		"""Update game controls depending on the current game state"""
+		# Any requested update is superseded by this one
+		if self.pending_update is not None:
+			self.after_cancel(self.pending_update)
+			self.pending_update = None
 		for widget in self.controls.winfo_children():
 			widget.destroy()
 
 
 		if self.game.active:
 			self.visible_word.grid()
-			self.visible_word.configure(text=' '.join(self.game.visible_word))
+			self.show_visible_word()
 
-			self.turtle.fillcolor('brown4')
-			self.turtle.pencolor('saddlebrown')
-			self.turtle.draw_base()
+			self.draw_base()
 
 			self.feedback.grid()
 			self.feedback.config(text='Guesses: ', anchor='w')
@@ -145,6 +217,7 @@ class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
 
 		elif self.game.inactive:
 			self.turtle.clear()
+			self.canvas.itemconfigure(BASE_TAG, state=tkinter.HIDDEN)
 
 			self.feedback.grid_remove()
 			self.feedback.config(text='', anchor='center')
@@ -159,25 +232,13 @@ class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
 			computer.pack(side=tkinter.LEFT, expand=True)
 
 		else:
-			new_text = (
-				textwrap.dedent(f'''
-				You won!
-
-				It took you {self.game.duration:.1f} seconds - about {self.game.duration / self.game.guess_count:.1f} seconds per guess, of which you took {self.game.guess_count} - to guess "{self.game.word}"!
-				''')
-				if self.game.won else
-				textwrap.dedent(f'''
-				You Lost!
-
-				You couldn't guess "{self.game.word}" in {self.game.duration:.1f} seconds, at a rate of {self.game.duration / self.game.guess_count:.1f} seconds per guess, of which you took {self.game.guess_count}...
-				''')
-			)
+			new_text = (WIN_MESSAGE if self.game.won else LOSS_MESSAGE).format(**self.game.summary._asdict())
 			self.feedback.grid()
 			self.feedback.config(text=new_text, anchor='center')
 
 			rtn = tkinter.Button(
 				self.controls, text='Main Menu',
-				command=lambda: self.game.stop() and self.update_controls()  # type: ignore
+				command=lambda: self.game.stop() and self.request_update_controls()  # type: ignore
 			)
 			rtn.focus_set()
 			rtn.pack()
@@ -193,7 +254,7 @@ class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
 				return
 
 		self.game.start(word)
-		self.update_controls()
+		self.request_update_controls()
 		if not self.game.active:
 			self.grab_set()
 			tkinter.messagebox.showerror('Unplayable', 'No words in wordbank')
@@ -207,39 +268,46 @@ class GameDisplay(tkinter.Frame):  # pylint: disable=too-many-ancestors
 		if not guess:
 			return
 
+		if guess in self.game.guessed_set:
+			entry.delete(0, tkinter.END)
+			self.grab_set()
+			tkinter.messagebox.showinfo('', 'Already guessed that')
+			return
+
 		entry.configure(state=tkinter.DISABLED)
 		submit.configure(state=tkinter.DISABLED)
 
-		if guess in [guess.guess for guess in self.game.guesses]:
-			self.grab_set()
-			tkinter.messagebox.showinfo('', 'Already guessed that')
-		elif not getattr(self.game, 'guess_' + ('letter' if len(guess) == 1 else 'word'))(guess):
+		if not (self.game.guess_letter if len(guess) == 1 else self.game.guess_word)(guess):
 			self.turtle.fillcolor('#d1a3a4')
 			self.turtle.pencolor('#d1a3a4')
 			self.turtle.draw_life(self.game.lives)
 		else:
-			self.visible_word.configure(text=' '.join(self.game.visible_word))
+			self.show_visible_word()
+
+		separator = ', ' if self.game.guess_count > 1 else ''
+		self.feedback.config(text=self.feedback['text'] + separator + guess)
+
+		# Rebuilt at once rather than when idle, so queued guesses never reach the finished game
+		if not self.game.active:
+			self.update_controls()
+			return
 
 		entry.configure(state=tkinter.NORMAL)
 		submit.configure(state=tkinter.NORMAL)
 
 		entry.delete(0, tkinter.END)
 
-		self.feedback.config(text='Guesses: ' + ', '.join(guess.guess for guess in self.game.guesses))
-		if not self.game.active:
-			self.update_controls()
-
 class WordViewer(tkinter.Toplevel):
 	"""Dialog to allow viewing and deleting of words"""
-	def __init__(self, *args: Any, game: Hangman, **kwargs: Any) -> None:
+	def __init__(self, *args: Any, game: Hangman, save: Callable[[], None], **kwargs: Any) -> None:
 		super().__init__(*args, **kwargs)
 		self.game = game
+		self.save = save
 		self.title('Current Words')
 
 		self.wordbox = tkinter.Listbox(self, selectmode=tkinter.MULTIPLE)
 		self.wordbox.pack()
-		for word in sorted(self.game.wordbank):
-			self.wordbox.insert(tkinter.END, word)
+		self.wordbox.insert(tkinter.END, *self.game.sorted_words)
 
 		self.bind('Delete', lambda _: self.delete_selected())
 		self.bind('KP_Delete', lambda _: self.delete_selected())
@@ -250,12 +318,14 @@ class WordViewer(tkinter.Toplevel):
 
 	def delete_selected(self) -> None:
 		"""Delete the currencly selected words"""
-		words = {self.wordbox.get(idx) for idx in self.wordbox.curselection()}
+		selected = self.wordbox.curselection()
+		words = {self.wordbox.get(idx) for idx in selected}
 		if not words:
 			return
 
 		before = len(self.game.wordbank)
-		self.game.wordbank.difference_update(words)
+		self.game.wordbank = self.game.wordbank - words
+		self.save()
 
 		self.grab_set()
 		tkinter.messagebox.showinfo(
@@ -263,21 +333,26 @@ class WordViewer(tkinter.Toplevel):
 			f'{before - len(self.game.wordbank)} words deleted'
 		)
 
-		self.wordbox.delete(0, tkinter.END)
-		for word in sorted(self.game.wordbank):
-			self.wordbox.insert(tkinter.END, word)
+		# Deleted from the end first so the remaining indexes stay valid
+		for idx in sorted(selected, reverse=True):
+			self.wordbox.delete(idx)
 
 class HangmanGUI(tkinter.Tk):
 	"""Tkinter GUI variation of Hangman"""
 	def __init__(self, wordfile: str, *args: Any, **kwargs: Any) -> None:
 		super().__init__(*args, **kwargs)
 		self.wordfile = wordfile
+		# Saves happen off the main thread, one at a time
+		self.saver = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+		self.pending_save: Optional[str] = None
+		self.protocol('WM_DELETE_WINDOW', self.destroy)
 
 		self.title('Hangman')
 		self.game = Hangman(
 			lives=6,
 			wordlocation=wordfile if os.path.exists(wordfile) else None,
-			allow_empty=True
+			allow_empty=True,
+			lazy=True
 		)
 		GameDisplay(self, game=self.game).pack(fill=tkinter.BOTH, expand=True)
 		# Generate menus
@@ -311,15 +386,52 @@ class HangmanGUI(tkinter.Tk):
 			event.widget.invoke()  # type: ignore
 
 	def save_wordfile(self) -> None:
-		"""Save content of wordbank to wordfile"""
-		with open(self.wordfile, 'w') as wordfile:
-			wordfile.write('\n'.join(self.game.wordbank))
+		"""Schedule saving of wordbank to wordfile, combining consecutive changes into one save"""
+		if self.pending_save is None:
+			self.pending_save = self.after(SAVE_DELAY, self.flush_wordfile)
+
+	def flush_wordfile(self) -> None:
+		"""Save the content of wordbank to wordfile in the background"""
+		self.pending_save = None
+		# Copied, as the wordbank can be changed while it's being written
+		self.report_save(self.saver.submit(write_wordfile, self.wordfile, frozenset(self.game.wordbank)))
+
+	def report_save(self, save: 'concurrent.futures.Future[None]') -> None:
+		"""Show an error if a background save failed, checking again later if still in progress"""
+		# Tk can only be used from the main thread, so the save is polled rather than calling back
+		if not save.done():
+			self.after(SAVE_DELAY, self.report_save, save)
+			return
+
+		ex = save.exception()
+		if ex:
+			self.show_save_error(ex)
+
+	def show_save_error(self, ex: BaseException) -> None:
+		"""Show error that occured saving to wordfile"""
+		self.grab_set()
+		tkinter.messagebox.showerror(
+			'Failed to save words',
+			f'Exception occured saving words to {self.wordfile}: {ex}'
+		)
+
+	def destroy(self) -> None:
+		"""Save any pending changes before closing"""
+		self.saver.shutdown()
+		# Written here and now, as nothing scheduled from now on would run
+		if self.pending_save is not None:
+			self.after_cancel(self.pending_save)
+			self.pending_save = None
+			try:
+				write_wordfile(self.wordfile, self.game.wordbank)
+			except OSError as ex:
+				self.show_save_error(ex)
+
+		super().destroy()
 
 	def view_words(self) -> None:
 		"""Open wordviewer"""
-		viewer = WordViewer(game=self.game)
-		viewer.bind('<Destroy>', lambda _: self.save_wordfile())
-		viewer.grab_set()
+		WordViewer(game=self.game, save=self.save_wordfile).grab_set()
 
 	def add_word(self) -> None:
 		"""Prompt user for word to add"""
@@ -333,7 +445,7 @@ class HangmanGUI(tkinter.Tk):
 			tkinter.messagebox.showinfo('Cannot Add', 'Word already exists in wordbank')
 			return
 
-		self.game.wordbank.add(word)
+		self.game.add_word(word)
 		self.save_wordfile()
 
 		self.grab_set()
@@ -347,14 +459,16 @@ class HangmanGUI(tkinter.Tk):
 			return
 
 		try:
-			before = len(self.game.wordbank)
-			self.game.wordbank.update(WordReader.fetch_wordlist(location))
-			self.save_wordfile()
+			# Only the new words are merged, leaving the wordbank and wordfile alone if there are none
+			words = WordReader.fetch_wordlist(location) - self.game.wordbank
+			if words:
+				self.game.wordbank = self.game.wordbank | words
+				self.save_wordfile()
 
 			self.grab_set()
 			tkinter.messagebox.showinfo(
 				'Wordlist added',
-				f'{len(self.game.wordbank) - before} words added from "{location}"'
+				f'{len(words)} words added from "{location}"'
 			)
 		except (ValueError, NotImplementedError) as ex:
 			self.grab_set()
@@ -365,7 +479,7 @@ class HangmanGUI(tkinter.Tk):
 
 	def remove_all(self) -> None:
 		"""Remove all words"""
-		self.game.wordbank.clear()
+		self.game.wordbank = set()
 		self.save_wordfile()
 
 		self.grab_set()
@@ -383,7 +497,7 @@ class HangmanGUI(tkinter.Tk):
 			tkinter.messagebox.showinfo('Cannot Remove', 'Word does not exist in wordbank')
 			return
 
-		self.game.wordbank.remove(word)
+		self.game.remove_word(word)
 		self.save_wordfile()
 		self.grab_set()
 		tkinter.messagebox.showinfo('Word Removed', 'Word successfully removed')
@@ -399,13 +513,15 @@ class HangmanGUI(tkinter.Tk):
 			return
 
 		try:
-			before = len(self.game.wordbank)
-			self.game.wordbank.difference_update(WordReader.fetch_wordlist(location))
-			self.save_wordfile()
+			words = self.game.wordbank & WordReader.fetch_wordlist(location)
+			if words:
+				self.game.wordbank = self.game.wordbank - words
+				self.save_wordfile()
+
 			self.grab_set()
 			tkinter.messagebox.showinfo(
 				'Wordlist removed',
-				f'{before - len(self.game.wordbank)} words removed from "{location}"'
+				f'{len(words)} words removed from "{location}"'
 			)
 		except (ValueError, NotImplementedError) as ex:
 			self.grab_set()
@@ -1,17 +1,62 @@
 """Test base Hangman class"""
+import io
 import os
+import json
 
 import unittest
 import unittest.mock
 import tempfile
 
-from hangman import Hangman, WordReader, GameState, GameStatus, Guess, HangmanOver
+from typing import List, Any
+
+import hangman_cli
+from hangman import Hangman, WordReader, GameState, GameStatus, GameSummary, Guess, HangmanOver
+
+
+class FakeResponse(io.BytesIO):
+	"""Stand-in for the response returned by urllib.request.urlopen"""
+	def __init__(self, body: bytes, content_type: str) -> None:
+		super().__init__(body)
+		self.headers = {'Content-Type': content_type}
+
+
+# Canned responses of the URLs fetched by tests
+RESPONSES = {
+	'https://httpbin.org/json': (
+		json.dumps({'slideshow': {'title': 'Sample Slide Show'}}).encode(), 'application/json'
+	),
+	'https://httpbin.org/status/200': (b'', 'text/html; charset=utf-8'),
+	'https://raw.githubusercontent.com/Xethron/Hangman/master/words.txt': (
+		'\n'.join(f'word{i}' for i in range(850)).encode(), 'text/plain; charset=utf-8'
+	),
+	'https://cdn.jsdelivr.net/gh/bevacqua/correcthorse/wordlist.json': (
+		json.dumps([f'word{i}' for i in range(2286)]).encode(), 'application/json; charset=utf-8'
+	)
+}
+
+# Words games are played through with, containing spaces which are always visible
+WORDS = ('ONE WORD', 'GAME OVER', 'KITTY CAT')
+
+def fake_urlopen(url: str) -> FakeResponse:
+	"""Respond to URL with canned response"""
+	return FakeResponse(*RESPONSES[url])
 
 
 class WordReaderTest(unittest.TestCase):
 	"""Test WordReader methods"""
 
-	def test_invalid_resources(self) -> None:
+	def setUp(self) -> None:
+		cache_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(cache_dir.cleanup)
+
+		patcher = unittest.mock.patch.object(WordReader, 'CACHE_DIR', cache_dir.name)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+		WordReader.fetch_url.cache_clear()
+
+	@unittest.mock.patch('urllib.request.urlopen', side_effect=fake_urlopen)
+	def test_invalid_resources(self, _: unittest.mock.MagicMock) -> None:
 		"""Invalid resources raise exceptions"""
 		# Non-sequence JSON wordlist
 		with self.assertRaises(Exception):
@@ -25,30 +70,65 @@ class WordReaderTest(unittest.TestCase):
 		with self.assertRaises(NotImplementedError):
 			WordReader.fetch_wordlist('notarealfile')
 
-	def test_load_text(self) -> None:
+	@unittest.mock.patch('os.path.exists', return_value=True)
+	def test_load_text(self, _: unittest.mock.MagicMock) -> None:
 		"""Words loaded from text file"""
+		word_file = unittest.mock.mock_open(read_data='abc\ndef\nghi\n')
+		with unittest.mock.patch('builtins.open', word_file):
+			self.assertEqual(WordReader.fetch_wordlist('words.txt'), {'ABC', 'DEF', 'GHI'})
+
+		self.assertEqual(WordReader.parse_file(io.StringIO('qwe, rty, uio\n')), {'QWE', 'RTY', 'UIO'})
+
+		self.assertEqual(WordReader.parse_text('abc, def\n\nghi,\n'), {'ABC', 'DEF', 'GHI'})
+
+	def test_load_json(self) -> None:
+		"""Words loaded from JSON array"""
+		self.assertEqual(
+			WordReader.parse_file(io.StringIO('["abc", "def", "ghi"]')), {'ABC', 'DEF', 'GHI'}
+		)
+		self.assertEqual(WordReader.parse_file(io.StringIO('\n  [\n"abc",\n"def"\n]\n')), {'ABC', 'DEF'})
+
+	def test_word_offsets(self) -> None:
+		"""Unique words located within text files, but not JSON"""
 		with tempfile.NamedTemporaryFile() as temp:
-			temp.write(b'abc\ndef\nghi\n')
+			temp.write(b'abc\n\n def, ghi\r\n ,\njkl\nDef')
 			temp.flush()
 
-			self.assertEqual(WordReader.fetch_wordlist(temp.name), {'ABC', 'DEF', 'GHI'})
+			self.assertEqual(
+				[WordReader.read_word(temp.name, offset) for offset in WordReader.word_offsets(temp.name)],
+				['ABC', 'DEF', 'GHI', 'JKL']
+			)
 
 		with tempfile.NamedTemporaryFile() as temp:
-			temp.write(b'qwe, rty, uio\n')
+			temp.write(b'["abc", "def"]')
 			temp.flush()
 
-			self.assertEqual(WordReader.fetch_wordlist(temp.name), {'QWE', 'RTY', 'UIO'})
+			self.assertFalse(WordReader.word_offsets(temp.name))
 
-	def test_load_json(self) -> None:
-		"""Words loaded from JSON array"""
 		with tempfile.NamedTemporaryFile() as temp:
-			temp.write(b'["abc", "def", "ghi"]')
-			temp.flush()
+			self.assertFalse(WordReader.word_offsets(temp.name))
+
+	@unittest.mock.patch('urllib.request.urlopen')
+	def test_fetch_cached(self, urlopen: unittest.mock.MagicMock) -> None:
+		"""Fetched wordlists are cached in memory and on disk"""
+		url = 'https://example.com/words.txt'
+		urlopen.side_effect = lambda _: FakeResponse(b'abc\ndef\n', 'text/plain; charset=utf-8')
 
-			self.assertEqual(WordReader.fetch_wordlist(temp.name), {'ABC', 'DEF', 'GHI'})
+		self.assertEqual(WordReader.fetch_wordlist(url), {'ABC', 'DEF'})
+		self.assertEqual(WordReader.fetch_wordlist(url), {'ABC', 'DEF'})
 
-	@unittest.skipUnless(os.getenv('CI'), 'CI not enabled')
-	def test_fetch_text(self) -> None:
+		WordReader.fetch_url.cache_clear()
+		self.assertEqual(WordReader.fetch_wordlist(url), {'ABC', 'DEF'})
+		urlopen.assert_called_once_with(url)
+
+		# Expired cache is refetched
+		with unittest.mock.patch.object(WordReader, 'CACHE_TTL', 0):
+			WordReader.fetch_url.cache_clear()
+			self.assertEqual(WordReader.fetch_wordlist(url), {'ABC', 'DEF'})
+		self.assertEqual(urlopen.call_count, 2)
+
+	@unittest.mock.patch('urllib.request.urlopen', side_effect=fake_urlopen)
+	def test_fetch_text(self, _: unittest.mock.MagicMock) -> None:
 		"""Text wordlist is fetched"""
 		self.assertEqual(
 			len(WordReader.fetch_wordlist(
@@ -57,8 +137,8 @@ class WordReaderTest(unittest.TestCase):
 			850
 		)
 
-	@unittest.skipUnless(os.getenv('CI'), 'CI not enabled')
-	def test_fetch_json(self) -> None:
+	@unittest.mock.patch('urllib.request.urlopen', side_effect=fake_urlopen)
+	def test_fetch_json(self, _: unittest.mock.MagicMock) -> None:
 		"""JSON wordlist is fetched"""
 		self.assertEqual(
 			len(WordReader.fetch_wordlist(
@@ -67,9 +147,15 @@ class WordReaderTest(unittest.TestCase):
 			2286
 		)
 
-class HangmanTest(unittest.TestCase):
+class HangmanTest(unittest.TestCase):  # pylint: disable=too-many-public-methods
 	"""Test the base Hangman class"""
 
+	def setUp(self) -> None:
+		# Games are timed from the epoch, as if every action were instant
+		patcher = unittest.mock.patch('time.time', return_value=0.0)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
 	def test_inactive(self) -> None:
 		"""Is properly set to inactive"""
 		with self.assertRaises(HangmanOver):
@@ -80,8 +166,7 @@ class HangmanTest(unittest.TestCase):
 
 		self.assertTrue(Hangman(allow_empty=True).inactive)
 
-	@unittest.mock.patch('time.time', return_value=0.0)
-	def test_stop(self, _: unittest.mock.MagicMock) -> None:
+	def test_stop(self) -> None:
 		"""Game can be stopped"""
 		game = Hangman(wordlist=['one']).start()
 		self.assertTrue(game.active)
@@ -91,17 +176,23 @@ class HangmanTest(unittest.TestCase):
 
 	def test_win(self) -> None:
 		"""Won state is set"""
-		game = Hangman(wordlist=['ONE WORD']).start()
-		self.assertEqual(game.guess_word('ONE WORD'), 7)
-		self.assertEqual(game.guess_count, 1)
-		self.assertTrue(game.won)
+		for word in WORDS:
+			with self.subTest(word=word):
+				game = Hangman(wordlist=[word]).start()
+				self.assertEqual(game.guess_word(word), len(word.replace(' ', '')))
+				self.assertEqual(game.guess_count, 1)
+				self.assertTrue(game.won)
 
 	def test_gameover_protection(self) -> None:
 		"""Actions are prevented when game is over"""
-		game = Hangman(wordlist=['GAME OVER']).start()
-		self.assertEqual(game.guess_word('GAME OVER'), 8)
-		with self.assertRaises(HangmanOver):
-			game.guess_letter('A')
+		for word in WORDS:
+			with self.subTest(word=word):
+				game = Hangman(wordlist=[word]).start()
+				self.assertEqual(game.guess_word(word), len(word.replace(' ', '')))
+				with self.assertRaises(HangmanOver):
+					game.guess_letter('A')
+				with self.assertRaises(HangmanOver):
+					game.guess_word(word)
 
 	def test_no_wordlist(self) -> None:
 		"""Ensure error when no words loaded"""
@@ -123,7 +214,7 @@ class HangmanTest(unittest.TestCase):
 		self.assertEqual(game.word, '')
 		game.start()
 		self.assertEqual(game.word, '')
-		self.assertFalse(game.used_words)
+		self.assertTrue(game.inactive)
 
 	@unittest.mock.patch('hangman.WordReader')
 	def test_calls_wordreader(self, wordreader: unittest.mock.MagicMock) -> None:
@@ -133,6 +224,25 @@ class HangmanTest(unittest.TestCase):
 
 		wordreader.fetch_wordlist.assert_called_with('hello world')
 
+	def test_lazy_wordlist(self) -> None:
+		"""Lazy wordfiles are only loaded once the wordbank is accessed"""
+		with tempfile.NamedTemporaryFile() as temp:
+			temp.write(b'abc\ndef\n')
+			temp.flush()
+
+			fetch_wordlist = WordReader.fetch_wordlist
+			with unittest.mock.patch.object(WordReader, 'fetch_wordlist', wraps=fetch_wordlist) as fetch:
+				game = Hangman(wordlocation=temp.name, lazy=True)
+				self.assertIn(game.start().word, {'ABC', 'DEF'})
+				fetch.assert_not_called()
+
+				self.assertEqual(game.wordbank, {'ABC', 'DEF'})
+				fetch.assert_called_once_with(temp.name)
+
+		with tempfile.NamedTemporaryFile() as temp:
+			with self.assertRaises(ValueError):
+				Hangman(wordlocation=temp.name, lazy=True)
+
 	def test_wordlist_uppercase(self) -> None:
 		"""Ensure the wordlist is all uppercase"""
 		self.assertEqual(Hangman(wordlist=['hello']).wordbank, {'HELLO'})
@@ -142,10 +252,28 @@ class HangmanTest(unittest.TestCase):
 		game = Hangman(wordlist=['ECHO LOCATION']).start()
 		self.assertEqual(game.guess_letter('O'), 3)
 		self.assertEqual(game.visible_word, '___O _O____O_')
+		self.assertEqual(game.visible_letters, {' ', 'O'})
 		self.assertEqual(game.guess_word('ECHO LOCATION'), 9)
 		self.assertEqual(game.guess_count, 2)
 		self.assertTrue(game.won)
 
+	def test_visible_word_reset(self) -> None:
+		"""Visible word is hidden again when restarting"""
+		game = Hangman(wordlist=['ABC', 'ABD']).start('ABC')
+		game.guess_letter('A')
+		self.assertEqual(game.visible_word, 'A__')
+		game.start('ABD')
+		self.assertEqual(game.visible_word, '___')
+		game.stop()
+		self.assertEqual(game.visible_word, '')
+
+	def test_visible_word_symbols(self) -> None:
+		"""Non-letter characters are hidden until guessed"""
+		game = Hangman(allow_empty=True).start('R2-D2')
+		self.assertEqual(game.visible_word, '_____')
+		self.assertEqual(game.guess_letter('2'), 2)
+		self.assertEqual(game.visible_word, '_2__2')
+
 	def test_guesses(self) -> None:
 		"""Guessing returns correct counts and history matches"""
 		game = Hangman(wordlist=['KITTY CAT']).start()
@@ -157,15 +285,76 @@ class HangmanTest(unittest.TestCase):
 			[tuple(guess[1:]) for guess in game.guesses],
 			[('M', 0), ('I', 1), ('T', 3), ('KITTY CAT', 4)]
 		)
+		self.assertEqual(game.guess_values, ['M', 'I', 'T', 'KITTY CAT'])
+		self.assertEqual(game.guessed_set, {'M', 'I', 'T', 'KITTY CAT'})
 		self.assertEqual(game.guess_count, 4)
 		self.assertTrue(game.won)
 
 	def test_word_reuse(self) -> None:
 		"""Wordbank is refreshed when exhausted"""
-		game = Hangman(wordlist=['123', '456']).start()
+		game = Hangman(wordlist=['123', '456'], random_seed=0).start()
+		self.assertEqual(game.word, '456')
 		game.start()
+		self.assertEqual(game.word, '123')
 		game.start()
-		self.assertTrue(game.word in ['123', '456'])
+		self.assertEqual(game.word, '456')
+
+	def test_word_order(self) -> None:
+		"""Every word is used once before any are repeated"""
+		game = Hangman(wordlist=['123', '456', '789'])
+		self.assertEqual({game.start().word for _ in range(3)}, {'123', '456', '789'})
+
+		game.wordbank = game.wordbank - {'123'}
+		self.assertEqual({game.start().word for _ in range(4)}, {'456', '789'})
+
+	def test_add_remove_word(self) -> None:
+		"""Single words are added to and removed from the wordbank in place"""
+		game = Hangman(wordlist=['b', 'c'])
+		wordbank = game.wordbank
+		self.assertEqual(game.sorted_words, ('B', 'C'))
+
+		game.add_word('A')
+		game.remove_word('C')
+		game.remove_word('D')
+		self.assertIs(game.wordbank, wordbank)
+		self.assertEqual(game.sorted_words, ('A', 'B'))
+		self.assertEqual({game.start().word for _ in range(2)}, {'A', 'B'})
+
+	def test_lazy_word_order(self) -> None:
+		"""Every word of a lazy wordfile is used once before any are repeated"""
+		with tempfile.NamedTemporaryFile() as temp:
+			temp.write(b'a\nabcdefghijklmnopqrstuvwxyz, b\n')
+			temp.flush()
+
+			game = Hangman(wordlocation=temp.name, lazy=True)
+			for _ in range(5):
+				self.assertEqual(
+					sorted(game.start().word for _ in range(3)), ['A', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'B']
+				)
+
+	def test_lazy_wordfile_rewritten(self) -> None:
+		"""Lazy wordfiles are located again once rewritten"""
+		with tempfile.TemporaryDirectory() as directory:
+			location = os.path.join(directory, 'words.txt')
+			with open(location, 'w') as wordfile:
+				wordfile.write('abc\ndef\n')
+
+			game = Hangman(wordlocation=location, lazy=True)
+			self.assertIn(game.start().word, {'ABC', 'DEF'})
+
+			with open(location + '.tmp', 'w') as wordfile:
+				wordfile.write('wxyz\n')
+			os.replace(location + '.tmp', location)
+
+			self.assertEqual({game.start().word for _ in range(2)}, {'WXYZ'})
+
+	def test_sorted_words(self) -> None:
+		"""Sorted words follow changes to the wordbank"""
+		game = Hangman(wordlist=['b', 'c', 'a'])
+		self.assertEqual(game.sorted_words, ('A', 'B', 'C'))
+
+		game.wordbank = game.wordbank - {'B'}
+		self.assertEqual(game.sorted_words, ('A', 'C'))
 
 	def test_game_lost(self) -> None:
 		"""Game is stopped when the user is out of lives"""
@@ -175,8 +364,16 @@ class HangmanTest(unittest.TestCase):
 		self.assertEqual(game.guess_letter('z'), 0)
 		self.assertTrue(game.lost)
 
-	@unittest.mock.patch('time.time', return_value=0.0)
-	def test_restart_state(self, _: unittest.mock.MagicMock) -> None:
+	def test_summary(self) -> None:
+		"""Summary reports seconds per guess, even before any guesses"""
+		game = Hangman(wordlist=['abc']).start()
+		with unittest.mock.patch('time.time', return_value=4.0):
+			self.assertEqual(game.summary, GameSummary(4.0, 0.0, 0, 'ABC'))
+			game.guess_letter('z')
+			game.guess_word('ABC')
+		self.assertEqual(game.summary, GameSummary(4.0, 2.0, 2, 'ABC'))
+
+	def test_restart_state(self) -> None:
 		"""State is reset when restarting"""
 		game = Hangman(wordlist=['ABC', 'DEF']).start()
 		word = game.word
@@ -191,9 +388,73 @@ class HangmanTest(unittest.TestCase):
 
 		self.assertNotEqual(game.word, word)
 		self.assertEqual(game.guesses, [])
+		self.assertFalse(game.guessed_set)
 		self.assertFalse(game.won)
 		self.assertTrue(game.duration < 1)
 		self.assertEqual(game.rounds, [state])
 
+class HangmanCLITest(unittest.TestCase):
+	"""Test deferred saving of the CLI"""
+
+	def setUp(self) -> None:
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.wordfile = os.path.join(directory.name, 'words.txt')
+
+		# stdin is waited on as if it were a terminal, with nothing typed unless a test says so
+		self.selected: List[Any] = []
+		selector = unittest.mock.MagicMock()
+		selector.__enter__.return_value.select.side_effect = lambda timeout: self.selected
+		for patcher in (
+			unittest.mock.patch('hangman_cli.IDLE_DETECTION', True),
+			unittest.mock.patch('selectors.DefaultSelector', return_value=selector),
+			unittest.mock.patch('sys.stdout', new_callable=io.StringIO)
+		):
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def saved_words(self) -> str:
+		"""Content of the wordfile"""
+		with open(self.wordfile) as wordfile:
+			return wordfile.read()
+
+	def test_idle_input(self) -> None:
+		"""Prompt is left to input, after on_idle is called only if nothing was typed ahead"""
+		on_idle = unittest.mock.MagicMock()
+		with unittest.mock.patch('builtins.input', return_value='1') as mock_input:
+			self.assertEqual(hangman_cli.idle_input('> ', on_idle), '1')
+			mock_input.assert_called_once_with('> ')
+			on_idle.assert_called_once_with()
+
+			self.selected = [unittest.mock.sentinel.event]
+			hangman_cli.idle_input('> ', on_idle)
+			on_idle.assert_called_once_with()
+
+	def test_flush_on_idle(self) -> None:
+		"""Wordfile is saved while waiting on the menu"""
+		cli = hangman_cli.HangmanCLI(self.wordfile)
+		cli.add_word('ABC')
+		cli.save_wordfile()
+
+		def exit_once_saved(_: str) -> str:
+			self.assertEqual(self.saved_words(), 'ABC')
+			return '1'
+
+		with unittest.mock.patch('builtins.input', side_effect=exit_once_saved):
+			cli.run()
+		self.assertFalse(cli.unsaved)
+
+	def test_flush_on_exit(self) -> None:
+		"""Wordfile is saved when the CLI exits, even through an exception"""
+		self.selected = [unittest.mock.sentinel.event]
+		cli = hangman_cli.HangmanCLI(self.wordfile)
+		cli.add_word('ABC')
+		cli.save_wordfile()
+
+		with unittest.mock.patch('builtins.input', side_effect=KeyboardInterrupt):
+			with self.assertRaises(KeyboardInterrupt):
+				cli.run()
+		self.assertEqual(self.saved_words(), 'ABC')
+
 if __name__ == '__main__':  # pragma: no cover
 	unittest.main()
@@ -2,11 +2,15 @@
 # pylint: disable=line-too-long
 """Task runner"""
 
+import fnmatch
+import functools
 import glob
+import inspect
+import shlex
 import sys
 import os
 
-from unittest.mock import patch
+from typing import Tuple
 from inspect import getfullargspec, ArgSpec
 
 import invoke
@@ -20,30 +24,49 @@ def fix_annotations():
 
 		Copied from: https://github.com/pyinvoke/invoke/issues/357#issuecomment-583851322
 	"""
+	# Swapped once for good, rather than patched in and out around every argspec call
+	if getattr(inspect.getargspec, 'fixes_annotations', False):
+		return
+
 	def patched_inspect_getargspec(func):
 		spec = getfullargspec(func)
 		return ArgSpec(*spec[0:4])
+	patched_inspect_getargspec.fixes_annotations = True
 
-	org_task_argspec = invoke.tasks.Task.argspec
+	inspect.getargspec = patched_inspect_getargspec
+fix_annotations()
 
-	def patched_task_argspec(*args, **kwargs):
-		with patch(target="inspect.getargspec", new=patched_inspect_getargspec):
-			return org_task_argspec(*args, **kwargs)
 
-	invoke.tasks.Task.argspec = patched_task_argspec
-fix_annotations()
+# Only globbed by the tasks which need them, and then only once
+@functools.lru_cache(maxsize=None)
+def py_files() -> Tuple[str, ...]:
+	"""Python files of the project"""
+	return tuple(glob.glob('**/*.py', recursive=True))
+
+@functools.lru_cache(maxsize=None)
+def test_files() -> Tuple[str, ...]:
+	"""Test files of the project"""
+	return tuple(path for path in py_files() if path.endswith('_test.py'))
 
+# Test classes are independent, so are spread across all cores but two - left for everything else
+TEST_WORKERS = max(1, (os.cpu_count() or 1) - 2)
 
-PY_FILES = ' '.join(glob.glob('**/*.py', recursive=True))
-TEST_FILES = ' '.join(glob.glob('**/*_test.py', recursive=True))
 
+# Results of previous pylint runs are kept within the project, so CI can cache them
+PYLINT_ENV = {'PYLINTHOME': os.path.abspath('.pylint_cache')}
 
 ARTIFACTS = ['pylint.json', 'pylint.html', 'coverage.xml', 'coverage.html']
+# Data files left behind by interrupted parallel coverage runs
+ARTIFACT_PATTERNS = ['.coverage.*']
 
 @task
 def cleanup(_: Context) -> None:
 	"""Cleanup task artifacts"""
-	deleting = [filename for filename in ARTIFACTS if os.path.exists(filename)]
+	# Artifacts are all in the current directory, so are found with a single listing
+	deleting = [
+		entry.name for entry in os.scandir('.')
+		if entry.name in ARTIFACTS or any(fnmatch.fnmatch(entry.name, pattern) for pattern in ARTIFACT_PATTERNS)
+	]
 	if not deleting:
 		return
 
@@ -55,18 +78,18 @@ def cleanup(_: Context) -> None:
 @task
 def mypy(ctx: Context) -> None:
 	"""Run mypy"""
-	ctx.run('mypy .', echo=True, pty=True)
+	ctx.run('mypy ' + shlex.join(py_files()), echo=True, pty=True)
 
 @task()
 def pylint(ctx: Context, html=False) -> None:
 	"""Run pylint"""
 	if html:
 		try:
-			result = ctx.run('pylint --load-plugins=pylint_json2html --output-format=jsonextended {} > pylint.json'.format(PY_FILES), echo=True)
+			result = ctx.run('pylint --load-plugins=pylint_json2html --output-format=jsonextended {} > pylint.json'.format(shlex.join(py_files())), echo=True, env=PYLINT_ENV)
 		except invoke.UnexpectedExit as ex:
 			try:
 				print('Failed, getting text output...')
-				ctx.run('pylint ' + PY_FILES, echo=True)
+				ctx.run('pylint ' + shlex.join(py_files()), echo=True, env=PYLINT_ENV)
 			except:  # pylint: disable=bare-except
 				pass
 			result = ex.result
@@ -74,7 +97,7 @@ def pylint(ctx: Context, html=False) -> None:
 		print('HTML absolute path: ' + os.path.abspath('pylint.html'))
 		ctx.run(f'(exit {result.exited})')
 	else:
-		ctx.run('pylint ' + PY_FILES, echo=True)
+		ctx.run('pylint ' + shlex.join(py_files()), echo=True, env=PYLINT_ENV)
 
 @task(mypy, pylint)
 def lint(_: Context):
@@ -82,28 +105,41 @@ def lint(_: Context):
 
 
 @task()
-def test(ctx: Context, coverage=False, html=False) -> None:
+def test(_: Context, coverage=False, html=False, failfast=False, verbose=False) -> None:
 	"""Run tests"""
 	if html and not coverage:
 		print('coverage required for HTML, enabling')
 		coverage = True
 
-	if not coverage:
-		ctx.run(sys.executable + ' -m unittest ' + TEST_FILES, echo=True)
-		return
+	# Ran within this process, rather than paying for another interpreter to start
+	import pytest  # pylint: disable=import-outside-toplevel
 
-	try:
-		result = ctx.run('coverage run -m unittest ' + TEST_FILES, echo=True, warn=True)
-	except invoke.UnexpectedExit as ex:
-		result = ex.result
+	# Sharded by test class, as a single test file would otherwise occupy only one worker
+	args = ['-n', str(TEST_WORKERS), '--dist=loadscope']
+	# Output of passing tests is already captured by pytest, CI needs only the first failure
+	if failfast or os.getenv('CI'):
+		args.append('--exitfirst')
+	if verbose:
+		args.append('--verbose')
+	if coverage:
+		# Coverage of each worker is combined by pytest-cov
+		args += ['--cov=.', '--cov-report=term', '--cov-report=xml']
+	args += test_files()
 
-	if not html:
-		return
+	print('pytest ' + ' '.join(args))
+	exit_code = int(pytest.main(args))
+
+	if html:
+		# pylint: disable=import-outside-toplevel
+		from pycobertura import Cobertura
+		from pycobertura.reporters import HtmlReporter
+
+		with open('coverage.html', 'w') as report:
+			report.write(HtmlReporter(Cobertura('coverage.xml')).generate())
+		print('HTML absolute path: ' + os.path.abspath('coverage.html'))
 
-	ctx.run('coverage xml', echo=True)
-	ctx.run('pycobertura show --format html --output coverage.html coverage.xml', echo=True)
-	print('HTML absolute path: ' + os.path.abspath('coverage.html'))
-	ctx.run(f'(exit {result.exited})')
+	if exit_code:
+		sys.exit(exit_code)
 
 @task
 def cli(ctx: Context) -> None: